@@ -7,6 +7,7 @@ import os
 import random
 import re
 import shutil
+import stat
 import subprocess
 import sys
 import time
@@ -82,28 +83,21 @@ def setup_logging():
     return logger
 
 
+# Benchmark run directories are prefixed with a YYYY-MM-DD-HH-MM-SS timestamp
+_BENCHMARK_DIR_RE = re.compile(r"^\d{4}-\d{2}-\d{2}-\d{2}-\d{2}-\d{2}")
+
+
 def find_latest_benchmark_dir():
     benchmark_dirs = [d for d in BENCHMARK_DNAME.iterdir() if d.is_dir()]
     if not benchmark_dirs:
         logging.error("No benchmark directories found under tmp.benchmarks.")
         sys.exit(1)
 
-    # Get current time and 24 hours ago
-    now = datetime.datetime.now()
-    day_ago = now - datetime.timedelta(days=1)
-
-    # Filter directories by name pattern YYYY-MM-DD-HH-MM-SS--
-    recent_dirs = []
-    for d in benchmark_dirs:
-        try:
-            # Extract datetime from directory name
-            date_str = d.name[:19]  # Takes YYYY-MM-DD-HH-MM-SS
-            dir_date = datetime.datetime.strptime(date_str, "%Y-%m-%d-%H-%M-%S")
-            if dir_date >= day_ago:
-                recent_dirs.append(d)
-        except ValueError:
-            # Skip directories that don't match the expected format
-            continue
+    # Directory names start with a zero-padded timestamp, so string order is chronological
+    day_ago = (datetime.datetime.now() - datetime.timedelta(days=1)).strftime("%Y-%m-%d-%H-%M-%S")
+    recent_dirs = [
+        d for d in benchmark_dirs if _BENCHMARK_DIR_RE.match(d.name) and d.name[:19] >= day_ago
+    ]
 
     if not recent_dirs:
         logging.error("No benchmark directories found from the last 24 hours.")
@@ -116,11 +110,14 @@ def find_latest_benchmark_dir():
     for d in recent_dirs:
         # Look for .md files in subdirectories
         for md_file in d.glob("*/exercises/practice/*/.*.md"):
-            if md_file.is_file():
-                mtime = md_file.stat().st_mtime
-                if mtime > latest_time:
-                    latest_time = mtime
-                    latest_dir = d
+            # One stat() per file instead of is_file() followed by stat()
+            try:
+                st = md_file.stat()
+            except OSError:
+                continue
+            if stat.S_ISREG(st.st_mode) and st.st_mtime > latest_time:
+                latest_time = st.st_mtime
+                latest_dir = d
 
     if not latest_dir:
         logging.error("No .md files found in recent benchmark directories.")
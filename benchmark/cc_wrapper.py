@@ -1,76 +1,418 @@
 """Claude Code wrapper that mimics aider's Coder interface for benchmark integration."""
+import array
 import asyncio
+import atexit
+import dataclasses
+import functools
+import hashlib
+import logging
 import os
+import sys
+import threading
+from collections import OrderedDict
 from pathlib import Path
-from typing import Dict
+from typing import Dict, List, Mapping, NamedTuple, Optional, Sequence, Tuple
 
 # Core imports - fail fast if critical dependencies missing
-from claude_code_sdk import query, ClaudeCodeOptions
-from models import ClaudeModel, lookup_model, get_available_models
+from claude_code_sdk import query, ClaudeCodeOptions, AssistantMessage, UserMessage, ResultMessage, TextBlock
+from models import ClaudeModel, lookup_model, get_available_models, print_available_models
+from llm_cache import CONTEXT_CALLS, LLMCache
 
 # Required dependency for token counting and model validation
-from anthropic import Anthropic
+import httpx
+import tiktoken
+from anthropic import Anthropic, DefaultHttpxClient
+
+# Optional: libuv-based event loop for the SDK message stream (not available on Windows)
+try:
+    import uvloop
+except ImportError:
+    uvloop = None
+
+logger = logging.getLogger(__name__)
+
+# Local BPE encoding used as a proxy for Claude's tokenizer
+LOCAL_TOKENIZER_ENCODING = "cl100k_base"
+# Token count cache sizing; shorter texts are counted directly without caching
+TOKEN_CACHE_SIZE = 1024
+MIN_CACHED_TOKEN_COUNT_CHARS = 200
+# Boundary used to find a cached prefix of a longer text
+TOKEN_CACHE_SEGMENT_SEPARATOR = b"\n\n"
+# Dynamic batching limits for concurrent SDK token counts
+TOKEN_BATCH_MAX_SIZE = 32
+TOKEN_BATCH_WAIT_TIMEOUT_S = 0.002
+# Approximate (input, output) USD per token by model family (as of 2025)
+# These are rough estimates - actual pricing may vary
+MODEL_PRICING = {
+    'sonnet': (3.0 / 1_000_000, 15.0 / 1_000_000),   # $3 / $15 per 1M tokens
+    'haiku': (0.25 / 1_000_000, 1.25 / 1_000_000),   # $0.25 / $1.25 per 1M tokens
+    'opus': (15.0 / 1_000_000, 75.0 / 1_000_000),    # $15 / $75 per 1M tokens
+}
+DEFAULT_PRICING_FAMILY = 'sonnet'
+# The session history and chat hashes of one wrapper are trimmed to the last
+# SESSION_HISTORY_LIMIT calls once they exceed twice that many
+SESSION_HISTORY_LIMIT = 1000
+# Environment variables that carry Claude Code credentials
+AUTH_ENV_VARS = ('CLAUDE_CODE_OAUTH_TOKEN', 'ANTHROPIC_API_KEY')
+# Model used for the minimal authentication probe
+AUTH_PROBE_MODEL = ClaudeModel.HAIKU_3_5_LATEST.value
+# Connection pool shared by all wrappers' Anthropic clients
+ANTHROPIC_POOL_LIMITS = httpx.Limits(max_connections=100, max_keepalive_connections=20)
+
+
+def _model_family(model: str) -> str:
+    """Return the pricing family of a model identifier (defaults to Sonnet).
+    
+    Identifiers follow ``claude-<version>-<family>-...`` or
+    ``claude-<family>-<version>-...``, so the family is one dash-separated part.
+    """
+    return next((part for part in model.lower().split('-') if part in MODEL_PRICING),
+                DEFAULT_PRICING_FAMILY)
+
+
+def _configure_logging(verbose: bool) -> None:
+    """Enable the wrapper's debug output for a verbose wrapper.
+    
+    The logger is shared by all wrappers, so it is only ever raised to DEBUG
+    (never lowered) - each wrapper gates its own messages on its verbose flag.
+    When nothing else has configured logging (standalone use), verbose output
+    goes to stdout.
+    """
+    if not verbose:
+        return
+    logger.setLevel(logging.DEBUG)
+    if not logger.handlers and not logging.getLogger().handlers:
+        stream_handler = logging.StreamHandler(sys.stdout)
+        stream_handler.setFormatter(logging.Formatter("[ClaudeCodeWrapper] %(message)s"))
+        logger.addHandler(stream_handler)
+
+
+@functools.lru_cache(maxsize=1)
+def _detect_permission_mode() -> str:
+    """Return the SDK permission mode for this process (the euid never changes)."""
+    # Check if running as root user (Unix/Linux/macOS)
+    try:
+        is_root = os.geteuid() == 0
+    except AttributeError:
+        # Windows or other platforms without geteuid()
+        is_root = False
+        
+    # Use acceptEdits for root (Docker compatibility) or bypassPermissions otherwise
+    return "acceptEdits" if is_root else "bypassPermissions"
+
+
+@functools.lru_cache(maxsize=1)
+def _shared_anthropic_client(api_key: str) -> Anthropic:
+    """Return a process-wide Anthropic client so wrappers share one connection pool."""
+    return Anthropic(api_key=api_key, http_client=DefaultHttpxClient(limits=ANTHROPIC_POOL_LIMITS))
+
+
+class TokenCountBatcher:
+    """Coalesces concurrent SDK token-count requests into one batched dispatch.
+    
+    Requests submitted within ``batch_wait_timeout_s`` of each other (up to
+    ``max_batch_size``) are sent together via a single ``asyncio.gather``, so
+    concurrent wrappers share one round of network latency. The queue lives on
+    the shared background loop; submissions from any other loop are handed to it.
+    """
+
+    def __init__(self, max_batch_size: int = TOKEN_BATCH_MAX_SIZE,
+                 batch_wait_timeout_s: float = TOKEN_BATCH_WAIT_TIMEOUT_S):
+        self.max_batch_size = max_batch_size
+        self.batch_wait_timeout_s = batch_wait_timeout_s
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+
+    async def submit(self, client: Anthropic, model: str, text: str) -> int:
+        """Queue a token count and wait for its batch to complete.
+        
+        Args:
+            client: Anthropic client used for the count
+            model: Model whose tokenizer to count with
+            text: Text to count tokens for
+            
+        Returns:
+            Input token count reported by the SDK
+        """
+        loop = _background_loop()
+        if asyncio.get_running_loop() is not loop:
+            # Queue, worker and futures all live on the shared background loop
+            return await asyncio.wrap_future(
+                asyncio.run_coroutine_threadsafe(self.submit(client, model, text), loop))
+        if self._queue is None:
+            self._loop, self._queue = loop, asyncio.Queue()
+
+        future = loop.create_future()
+        self._queue.put_nowait((client, model, text, future))
+        if self._worker is None or self._worker.done():
+            self._worker = loop.create_task(self._drain())
+        return await future
+
+    async def _drain(self) -> None:
+        """Dispatch queued requests in batches until the queue is empty."""
+        while not self._queue.empty():
+            batch = [self._queue.get_nowait()]
+            deadline = self._loop.time() + self.batch_wait_timeout_s
+            while len(batch) < self.max_batch_size:
+                timeout = deadline - self._loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            await self._dispatch(batch)
+
+    @staticmethod
+    async def _dispatch(batch: List[Tuple[Anthropic, str, str, asyncio.Future]]) -> None:
+        results = await asyncio.gather(
+            *(asyncio.to_thread(client.messages.count_tokens,
+                                model=model,
+                                messages=[{"role": "user", "content": text}])
+              for client, model, text, _ in batch),
+            return_exceptions=True
+        )
+        for (_, _, _, future), result in zip(batch, results):
+            if future.done():
+                continue
+            if isinstance(result, BaseException):
+                future.set_exception(result)
+            else:
+                future.set_result(result.input_tokens)
+
+
+# Shared across wrapper instances so concurrent benchmark runs batch together
+_token_batcher = TokenCountBatcher()
+
+# Background event loop shared by all wrappers, started on first use
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_loop_lock = threading.Lock()
+
+
+def _background_loop() -> asyncio.AbstractEventLoop:
+    """Start (once) the daemon thread whose event loop runs all SDK work.
+    
+    A dedicated loop keeps ``run()`` usable from sync code and from inside an
+    already-running event loop, without touching the caller's thread-local loop.
+    """
+    global _loop
+    if _loop is not None:
+        return _loop
+    with _loop_lock:
+        # Wrappers may be created from several threads at once
+        if _loop is None:
+            _loop = _start_background_loop()
+    return _loop
+
+
+def _start_background_loop() -> asyncio.AbstractEventLoop:
+    loop = uvloop.new_event_loop() if uvloop else asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_forever, name="cc-wrapper-loop", daemon=True)
+    thread.start()
+
+    def shutdown() -> None:
+        # Finalize SDK streams left open by an early break, as asyncio.run() does
+        future = asyncio.run_coroutine_threadsafe(loop.shutdown_asyncgens(), loop)
+        try:
+            future.result(timeout=5)
+        except TimeoutError:
+            future.cancel()
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join(timeout=5)
+        # Closing a loop that is still running raises; the daemon thread dies with the process
+        if not thread.is_alive():
+            loop.close()
+
+    atexit.register(shutdown)
+    return loop
+
+
+def _run_in_background(coro):
+    """Run a coroutine on the background loop and block until it finishes."""
+    loop = _background_loop()
+    try:
+        running = asyncio.get_running_loop()
+    except RuntimeError:
+        running = None
+    if running is loop:
+        coro.close()
+        raise RuntimeError("ClaudeCodeWrapper.run() cannot be called from its own event loop; await _async_run() instead")
+
+    future = asyncio.run_coroutine_threadsafe(coro, loop)
+    try:
+        return future.result()
+    except BaseException:
+        # E.g. KeyboardInterrupt while waiting - stop the SDK query too
+        future.cancel()
+        raise
+
+
+# Local tokenizer shared by all wrappers, loaded on first use (None if loading failed)
+_tokenizer: "Optional[tiktoken.Encoding]" = None
+_tokenizer_loaded = False
+_tokenizer_lock = threading.Lock()
+
+
+def _local_tokenizer() -> "Optional[tiktoken.Encoding]":
+    """Return the local tokenizer, loading it once per process.
+    
+    tiktoken downloads the BPE file on first use unless it is already in
+    ``TIKTOKEN_CACHE_DIR``; a failed load is remembered, so later counts fall
+    back to character estimates without retrying the download.
+    """
+    global _tokenizer, _tokenizer_loaded
+    if _tokenizer_loaded:
+        return _tokenizer
+    with _tokenizer_lock:
+        if not _tokenizer_loaded:
+            try:
+                _tokenizer = tiktoken.get_encoding(LOCAL_TOKENIZER_ENCODING)
+            except Exception as e:
+                logger.warning("Local tokenizer unavailable: %s - using fallback estimation", e)
+            _tokenizer_loaded = True
+    return _tokenizer
+
+
+# (credentials fingerprint, probe model) pairs already verified in this process
+_AUTH_VERIFIED: set[Tuple[str, str]] = set()
+# Held from the check through the probe, so wrappers built at once share one probe
+_auth_lock = threading.Lock()
+
+
+def _auth_cache_key() -> Tuple[str, str]:
+    """Key the auth probe on the current credentials without keeping them in memory."""
+    credentials = "\0".join(os.environ.get(name, "") for name in AUTH_ENV_VARS)
+    return hashlib.blake2b(credentials.encode(), digest_size=16).hexdigest(), AUTH_PROBE_MODEL
+
+# Process-wide LRU: (token counter, text digest) -> token count. Shared so the
+# fresh wrapper created for each exercise still hits on repeated prompts.
+_token_cache: "OrderedDict[Tuple[str, bytes], int]" = OrderedDict()
+
+
+@dataclasses.dataclass(slots=True)
+class _Metrics:
+    """Per-wrapper counters reported to the benchmark harness."""
+    total_cost: float = 0.0
+    total_tokens_sent: int = 0
+    total_tokens_received: int = 0
+    total_thinking_tokens: int = 0  # Track Claude's thinking tokens separately
+    api_calls_count: int = 0
+    num_exhausted_context_windows: int = 0
+    num_malformed_responses: int = 0
+
+
+class _CallUsage(NamedTuple):
+    """Cost and token usage of one call (reported by its ResultMessage or estimated)."""
+    input_tokens: int = 0
+    output_tokens: int = 0
+    thinking_tokens: int = 0
+    cost: float = 0.0
+    is_error: bool = False
+
+
+def _metric_property(name: str) -> property:
+    """Expose a _Metrics field as a read/write attribute of the wrapper."""
+    def fget(self):
+        return getattr(self._metrics, name)
+
+    def fset(self, value):
+        setattr(self._metrics, name, value)
+
+    return property(fget, fset, doc=f"Passthrough to the wrapper's _Metrics.{name}.")
+
 
 class ClaudeCodeWrapper:
     """Wrapper class that mimics aider's Coder interface using Claude Code SDK."""
 
-    def __init__(self, model: str = ClaudeModel.get_default().value, verbose: bool = False):
+    # aider-compatible counters, stored together in a slotted _Metrics
+    total_cost = _metric_property('total_cost')
+    total_tokens_sent = _metric_property('total_tokens_sent')
+    total_tokens_received = _metric_property('total_tokens_received')
+    total_thinking_tokens = _metric_property('total_thinking_tokens')
+    api_calls_count = _metric_property('api_calls_count')
+    num_exhausted_context_windows = _metric_property('num_exhausted_context_windows')
+    num_malformed_responses = _metric_property('num_malformed_responses')
+
+    def __init__(self, model: str = ClaudeModel.get_default().value, verbose: bool = False,
+                 exact_tokens: bool = False, skip_auth_check: bool = False,
+                 continue_conversation: bool = True):
         """Initialize the Claude Code wrapper.
         
         Args:
             model: Claude model to use (supports aider, benchmark, or Claude Code identifiers)
             verbose: Enable verbose logging
+            exact_tokens: Count tokens via the Anthropic API instead of the local tokenizer
+            skip_auth_check: Skip the authentication probe (caller trusts the environment)
+            continue_conversation: Continue the working directory's most recent conversation
+                on each call (False sends every prompt as a fresh session)
         """
+        _configure_logging(verbose)
+
         # Resolve model identifier using lookup
         try:
             self.model = lookup_model(model)
             if verbose:
-                print(f"[ClaudeCodeWrapper] Resolved model '{model}' -> '{self.model}'")
+                logger.debug("Resolved model '%s' -> '%s'", model, self.model)
         except ValueError as e:
             if verbose:
-                print(f"[ClaudeCodeWrapper] Model resolution failed: {e}")
+                logger.warning("Model resolution failed: %s", e)
             # Fall back to original model name if lookup fails
             self.model = model
             
         self.verbose = verbose
-        self.cwd = Path(os.getcwd())
+        self.exact_tokens = exact_tokens
+        self.cwd = Path.cwd()
+        self._permission_mode = self._get_permission_mode()
+        # Model is fixed for the wrapper's lifetime, so resolve its pricing once
+        self._input_cost_per_token, self._output_cost_per_token = MODEL_PRICING[_model_family(self.model)]
+        # SDK options reused by every query; rebuilt when cwd changes
+        self._options = ClaudeCodeOptions(
+            model=self.model,
+            permission_mode=self._permission_mode,  # Auto-approve for benchmark
+            cwd=self.cwd,
+            continue_conversation=continue_conversation  # For session continuity
+        )
         
         # Compatibility attributes with aider interface
         self.last_keyboard_interrupt = False
-        self.total_cost = 0.0
-        self.num_exhausted_context_windows = 0
-        self.num_malformed_responses = 0
-        self.total_tokens_sent = 0
-        self.total_tokens_received = 0
-        self.total_thinking_tokens = 0  # Track Claude's thinking tokens separately
+        self._metrics = _Metrics()  # total_cost, token totals, error counts, api_calls_count
         self.chat_completion_call_hashes = []
         self.chat_completion_response_hashes = []
         self.ignore_mentions = set()
         self.partial_response_content = ""
         
-        # Additional metrics tracking
-        self.api_calls_count = 0
-        self.session_messages = []  # Store session history for continuity tracking
+        # Session history for continuity tracking, stored column-wise (see session_messages)
+        self._session_prompts: List[str] = []
+        self._session_response_lengths = array.array('q')
+        self._session_tokens_in = array.array('q')
+        self._session_tokens_out = array.array('q')
+        self._session_costs = array.array('d')
+        # Response cache, enabled via CC_BENCHMARK_CACHE=1 (see llm_cache.py)
+        self._response_cache = LLMCache.from_env()
+        # LLMCache.context_hash() of the last CONTEXT_CALLS prompts of the conversation
+        self._cache_context: List[str] = []
         
-        # Initialize Anthropic client for accurate token counting (optional dependency)
+        # Initialize Anthropic client for exact token counting (opt-in, needs API key)
         try:
             # Check if API key is available in environment
-            api_key = os.environ.get('ANTHROPIC_API_KEY')
+            api_key = os.environ.get('ANTHROPIC_API_KEY') if exact_tokens else None
             if api_key:
-                self.anthropic_client = Anthropic(api_key=api_key)
+                self.anthropic_client = _shared_anthropic_client(api_key)
                 if verbose:
-                    print("ℹ️  [ClaudeCodeWrapper] Anthropic client initialized - accurate token counting enabled")
+                    logger.debug("Anthropic client initialized - accurate token counting enabled")
             else:
                 self.anthropic_client = None
                 if verbose:
-                    print("ℹ️  [ClaudeCodeWrapper] ANTHROPIC_API_KEY not found - token counting will use fallback estimation")
+                    logger.debug("Exact token counting disabled - using local tokenizer")
         except Exception as e:
             self.anthropic_client = None
             if verbose:
-                print(f"⚠️  [ClaudeCodeWrapper] Anthropic client initialization failed: {e} - using fallback estimation")
+                logger.warning("Anthropic client initialization failed: %s - using local tokenizer", e)
 
         # Verify authentication
-        self._verify_authentication()
+        if not skip_auth_check:
+            self._verify_authentication()
 
     def _get_permission_mode(self) -> str:
         """Get appropriate permission mode based on execution environment.
@@ -78,45 +420,52 @@ class ClaudeCodeWrapper:
         Returns:
             Permission mode string for ClaudeCodeOptions
         """
-        # Check if running as root user (Unix/Linux/macOS)
-        try:
-            is_root = os.geteuid() == 0
-        except AttributeError:
-            # Windows or other platforms without geteuid()
-            is_root = False
-            
-        # Use acceptEdits for root (Docker compatibility) or bypassPermissions otherwise
-        return "acceptEdits" if is_root else "bypassPermissions"
+        return _detect_permission_mode()
 
-    def _verify_authentication(self) -> None:
+    def _verify_authentication(self, force: bool = False) -> None:
         """Verify that Claude Code is logged in and available using SDK.
         
+        The probe runs once per process for a given set of credentials.
+        
+        Args:
+            force: Re-run the probe even if these credentials were already verified
+        
         Raises:
             RuntimeError: If Claude Code is not authenticated or available
         """
-        try:
-            # Test authentication with a minimal SDK query
-            asyncio.run(self._test_authentication())
-            
-            if self.verbose:
-                print("[ClaudeCodeWrapper] Authentication verified successfully")
+        auth_key = _auth_cache_key()
+        with _auth_lock:
+            if force:
+                _AUTH_VERIFIED.discard(auth_key)
+            elif auth_key in _AUTH_VERIFIED:
+                if self.verbose:
+                    logger.debug("Authentication already verified - skipping probe")
+                return
+
+            try:
+                # Test authentication with a minimal SDK query
+                _run_in_background(self._test_authentication())
+                _AUTH_VERIFIED.add(auth_key)
                 
-        except Exception as e:
-            # Handle various SDK authentication errors
-            error_msg = str(e).lower()
-            if "not authenticated" in error_msg or "login" in error_msg or "api key" in error_msg:
-                raise RuntimeError(
-                    "Claude Code is not authenticated. Please run 'claude' to log in or check your API key."
-                )
-            else:
-                raise RuntimeError(f"Claude Code SDK verification failed: {e}")
+                if self.verbose:
+                    logger.debug("Authentication verified successfully")
+                    
+            except Exception as e:
+                # Handle various SDK authentication errors
+                error_msg = str(e).lower()
+                if "not authenticated" in error_msg or "login" in error_msg or "api key" in error_msg:
+                    raise RuntimeError(
+                        "Claude Code is not authenticated. Please run 'claude' to log in or check your API key."
+                    )
+                else:
+                    raise RuntimeError(f"Claude Code SDK verification failed: {e}")
     
     async def _test_authentication(self) -> None:
         """Test authentication with a minimal SDK query."""
         options = ClaudeCodeOptions(
             max_turns=1,
-            model=ClaudeModel.HAIKU_3_5_LATEST.value,
-            permission_mode=self._get_permission_mode(),
+            model=AUTH_PROBE_MODEL,
+            permission_mode=self._permission_mode,
             cwd=self.cwd
         )
         
@@ -128,42 +477,108 @@ class ClaudeCodeWrapper:
         async for message in query(prompt=test_prompt, options=options):
             message_received = True
             if self.verbose:
-                print(f"[ClaudeCodeWrapper] Auth test - received {type(message).__name__}")
+                logger.debug("Auth test - received %s", type(message).__name__)
             # We just need one successful message to verify auth works
             break
             
         if not message_received:
             raise RuntimeError("No response received from Claude Code SDK")
 
-    def _estimate_tokens(self, text: str) -> int:
-        """Count tokens using Anthropic SDK or character-based fallback.
+    async def _estimate_tokens(self, text: str, data: Optional[bytes] = None) -> int:
+        """Count tokens using the local tokenizer, or Anthropic SDK if exact counts are enabled.
+        
+        Counts are memoized process-wide by text digest, so repeated prompts are
+        never recounted. When a text extends a previously counted one (e.g. a
+        growing conversation), only the new suffix is counted and added to the
+        cached prefix count.
         
         Args:
             text: Text to count tokens for
+            data: ``text`` already encoded as UTF-8, if the caller has it
             
         Returns:
-            Token count from Anthropic SDK or fallback estimate
+            Token count from Anthropic SDK, local tokenizer or fallback estimate
         """
         if not text:
             return 0
             
-        # Use Anthropic SDK if available
+        # Short texts are cheaper to count than to hash, and not worth a network round-trip
+        if len(text) < MIN_CACHED_TOKEN_COUNT_CHARS:
+            return self._count_tokens_locally(text)
+
+        if data is None:
+            data = text.encode()
+        key, prefix_count, suffix = self._lookup_cached_prefix(data)
+        if not suffix:
+            return prefix_count
+
         if self.anthropic_client:
             try:
-                count = self.anthropic_client.messages.count_tokens(
-                    model=self.model,
-                    messages=[{"role": "user", "content": text}]
-                )
-                print(f"[ClaudeCodeWrapper] SDK token count: {count.input_tokens}")
-                return count.input_tokens
+                suffix_count = await _token_batcher.submit(self.anthropic_client, self.model, suffix.decode())
             except Exception as e:
                 if self.verbose:
-                    print(f"⚠️  [ClaudeCodeWrapper] SDK token counting failed: {e}")
+                    logger.warning("SDK token counting failed: %s - using local tokenizer", e)
+                return self._count_tokens_locally(text)
+        else:
+            suffix_count = self._count_tokens_locally(suffix.decode())
 
-        if self.verbose:
-            print("ℹ️  [ClaudeCodeWrapper] Using fallback character-based token counting")
+        total = prefix_count + suffix_count
+        self._cache_token_count(key, total)
+        return total
+
+    @property
+    def _token_counter_id(self) -> str:
+        """Identifies which counter produced a cached count (exact counts are per model)."""
+        if self.anthropic_client:
+            return self.model
+        return LOCAL_TOKENIZER_ENCODING if _local_tokenizer() else "chars"
+
+    def _count_tokens_locally(self, text: str) -> int:
+        """Count tokens in-process, falling back to a character-based estimate."""
+        tokenizer = _local_tokenizer()
+        if tokenizer:
+            # Treat special-token text like "<|endoftext|>" as plain text
+            return max(1, len(tokenizer.encode(text, disallowed_special=())))
         return max(1, len(text) // 3)
 
+    def _lookup_cached_prefix(self, data: bytes) -> Tuple[Tuple[str, bytes], int, bytes]:
+        """Find the longest cached prefix of ``data`` on segment boundaries.
+        
+        Args:
+            data: Encoded text to look up
+            
+        Returns:
+            Tuple of (cache key for the full text, cached token count of the
+            prefix, remaining uncounted suffix)
+        """
+        digest = hashlib.blake2b(digest_size=16)
+        # Resolved once: prompts with file contents can have hundreds of segments
+        counter_id = self._token_counter_id
+        best_key, best_count, best_end = None, 0, 0
+        end = 0
+        for i, segment in enumerate(data.split(TOKEN_CACHE_SEGMENT_SEPARATOR)):
+            if i:
+                digest.update(TOKEN_CACHE_SEGMENT_SEPARATOR)
+                end += len(TOKEN_CACHE_SEGMENT_SEPARATOR)
+            digest.update(segment)
+            end += len(segment)
+            key = (counter_id, digest.digest())
+            cached = _token_cache.get(key)
+            if cached is not None:
+                best_key, best_count, best_end = key, cached, end
+
+        if best_key is not None:
+            _token_cache.move_to_end(best_key)
+        return key, best_count, data[best_end:]
+
+    @staticmethod
+    def _cache_token_count(key: Tuple[str, bytes], count: int) -> None:
+        """Store a token count, evicting the least recently used entry when full."""
+        _token_cache[key] = count
+        _token_cache.move_to_end(key)
+        if len(_token_cache) > TOKEN_CACHE_SIZE:
+            _token_cache.popitem(last=False)
+
     def _estimate_cost(self, input_tokens: int, output_tokens: int) -> float:
         """Estimate cost based on token counts and model pricing.
         
@@ -174,92 +589,110 @@ class ClaudeCodeWrapper:
         Returns:
             Estimated cost in USD
         """
-        # Approximate pricing for Claude models (as of 2025)
-        # These are rough estimates - actual pricing may vary
-        model_lower = self.model.lower()
-        
-        if 'sonnet' in model_lower:
-            # Claude Sonnet pricing (approximate)
-            input_cost_per_token = 3.0 / 1_000_000  # $3 per 1M input tokens
-            output_cost_per_token = 15.0 / 1_000_000  # $15 per 1M output tokens
-        elif 'haiku' in model_lower:
-            # Claude Haiku pricing (approximate)
-            input_cost_per_token = 0.25 / 1_000_000  # $0.25 per 1M input tokens
-            output_cost_per_token = 1.25 / 1_000_000  # $1.25 per 1M output tokens
-        elif 'opus' in model_lower:
-            # Claude Opus pricing (approximate)
-            input_cost_per_token = 15.0 / 1_000_000  # $15 per 1M input tokens
-            output_cost_per_token = 75.0 / 1_000_000  # $75 per 1M output tokens
-        else:
-            # Default to Sonnet pricing
-            input_cost_per_token = 3.0 / 1_000_000
-            output_cost_per_token = 15.0 / 1_000_000
-            
-        return (input_tokens * input_cost_per_token) + (output_tokens * output_cost_per_token)
+        return (input_tokens * self._input_cost_per_token) + (output_tokens * self._output_cost_per_token)
 
-    def _update_metrics_from_message(self, message) -> None:
+    def _update_metrics_from_message(self, message) -> Optional[_CallUsage]:
         """Extract and update metrics from SDK message objects.
         
         Args:
             message: Message object from Claude Code SDK
+            
+        Returns:
+            The call's usage if the message is a ResultMessage, otherwise None
         """
         try:
-            message_type = type(message).__name__
-            
-            # Handle ResultMessage - contains real cost and token metrics
-            if message_type == 'ResultMessage':
-                if hasattr(message, 'total_cost_usd'):
-                    # Replace estimated cost with real cost from API
-                    self.total_cost = getattr(message, 'total_cost_usd', 0.0)
-                    if self.verbose:
-                        print(f"[ClaudeCodeWrapper] Updated cost from ResultMessage: ${self.total_cost:.6f}")
-                
-                # Extract real token counts from usage data
-                if hasattr(message, 'usage') and isinstance(message.usage, dict):
-                    usage = message.usage
-                    if 'input_tokens' in usage:
-                        self.total_tokens_sent = usage['input_tokens']
-                        if self.verbose:
-                            print(f"[ClaudeCodeWrapper] Updated input tokens: {self.total_tokens_sent}")
-                    if 'output_tokens' in usage:
-                        self.total_tokens_received = usage['output_tokens']
-                        if self.verbose:
-                            print(f"[ClaudeCodeWrapper] Updated output tokens: {self.total_tokens_received}")
-                    if 'cache_read_input_tokens' in usage:
-                        self.total_thinking_tokens = usage['cache_read_input_tokens']
-                        if self.verbose:
-                            print(f"[ClaudeCodeWrapper] Updated thinking tokens: {self.total_thinking_tokens}")
-            
             # Note: AssistantMessage contains only content blocks, no usage data
             # All metrics are exclusively available in ResultMessage (verified via SDK investigation)
-            
-            # Check for SDK-specific error indicators in ResultMessage
-            if message_type == 'ResultMessage':
-                if hasattr(message, 'is_error') and message.is_error:
-                    self.num_malformed_responses += 1
-                    if self.verbose:
-                        print(f"[ClaudeCodeWrapper] ResultMessage indicates error: {getattr(message, 'subtype', 'unknown')}")
-                elif hasattr(message, 'subtype') and 'error' in str(message.subtype).lower():
-                    if 'max_turns' in str(message.subtype).lower() or 'context' in str(message.subtype).lower():
-                        self.num_exhausted_context_windows += 1
-                    else:
-                        self.num_malformed_responses += 1
+            if isinstance(message, ResultMessage):
+                return self._update_metrics_from_result(message)
                         
             # Fallback generic error detection for other message types
-            elif hasattr(message, 'error') and message.error:
+            elif getattr(message, 'error', None):
                 error_str = str(message.error).lower()
                 if "context" in error_str and ("window" in error_str or "length" in error_str):
-                    self.num_exhausted_context_windows += 1
+                    self._metrics.num_exhausted_context_windows += 1
                 elif "malformed" in error_str or "invalid" in error_str:
-                    self.num_malformed_responses += 1
+                    self._metrics.num_malformed_responses += 1
                     
-        except Exception as e:
+        except (AttributeError, KeyError, TypeError) as e:
             if self.verbose:
-                print(f"[ClaudeCodeWrapper] Warning: Could not extract metrics from message: {e}")
+                logger.warning("Could not extract metrics from message: %s", e)
                 # Only show detailed debugging if DEBUG environment variable is set
                 if os.environ.get('DEBUG'):
-                    print(f"[ClaudeCodeWrapper] Message type: {type(message).__name__}")
-                    print(f"[ClaudeCodeWrapper] Message attributes: {list(getattr(message, '__dict__', {}).keys())}")
+                    logger.debug("Message type: %s", type(message).__name__)
+                    logger.debug("Message attributes: %s", list(getattr(message, '__dict__', {}).keys()))
+        return None
+
+    def _update_metrics_from_result(self, message: ResultMessage) -> _CallUsage:
+        """Take real cost, token and error metrics from a ResultMessage.
+        
+        Each query() is its own Claude Code invocation, so the message reports
+        the usage of this call alone; it is added to the wrapper totals.
+        
+        Args:
+            message: Final ResultMessage of a query
+            
+        Returns:
+            Cost, token usage and error status of the call, kept per call so that
+            concurrent calls on one wrapper don't overwrite each other
+        """
+        m = self._metrics
+        # Extract real token counts from usage data; absent keys count as zero
+        usage = message.usage or {}
+        input_tokens = usage.get('input_tokens') or 0
+        output_tokens = usage.get('output_tokens') or 0
+        thinking_tokens = usage.get('cache_read_input_tokens') or 0
+        cost = message.total_cost_usd or 0.0
+
+        # Check for SDK-specific error indicators
+        subtype = str(message.subtype).lower()
+        is_error = bool(message.is_error)
+        if is_error:
+            m.num_malformed_responses += 1
+            if self.verbose:
+                logger.debug("ResultMessage indicates error: %s", message.subtype)
+        elif 'error' in subtype:
+            is_error = True
+            if 'max_turns' in subtype or 'context' in subtype:
+                m.num_exhausted_context_windows += 1
+            else:
+                m.num_malformed_responses += 1
+
+        call_usage = _CallUsage(input_tokens, output_tokens, thinking_tokens, cost, is_error)
+        self._add_usage(call_usage)
+        if self.verbose:
+            logger.debug("Call cost from ResultMessage: $%.6f (total $%.6f)", cost, m.total_cost)
+            logger.debug("Call tokens - In: %d, Out: %d, Thinking: %d",
+                         input_tokens, output_tokens, thinking_tokens)
+        return call_usage
+
+    def _add_usage(self, usage: _CallUsage) -> None:
+        """Add one call's cost and token usage to the wrapper totals."""
+        m = self._metrics
+        m.total_cost += usage.cost
+        m.total_tokens_sent += usage.input_tokens
+        m.total_tokens_received += usage.output_tokens
+        m.total_thinking_tokens += usage.thinking_tokens
+
+    def _collect_assistant_text(self, message: AssistantMessage, result_parts: List[str]) -> None:
+        """Collect text from assistant messages, filtering out tool blocks."""
+        for content_block in message.content:
+            # Only extract TextBlock content, skip ToolUseBlock
+            if isinstance(content_block, TextBlock):
+                result_parts.append(content_block.text)
+
+    def _collect_result_text(self, message: ResultMessage, result_parts: List[str]) -> None:
+        """Prefer the final processed response from the result message, if present."""
+        if message.result and isinstance(message.result, str):
+            result_parts[:] = [message.result]
+
+    # Response-text handlers keyed on SDK message class
+    _TEXT_HANDLERS = {
+        AssistantMessage: _collect_assistant_text,
+        ResultMessage: _collect_result_text,
+    }
+    # Message classes that carry only content blocks - no usage, cost or error fields
+    _CONTENT_ONLY_MESSAGES = frozenset({AssistantMessage, UserMessage})
 
     def run(self, with_message: str, preproc: bool = False) -> str:
         """Run a prompt through Claude Code SDK (sync interface mimicking aider).
@@ -272,132 +705,221 @@ class ClaudeCodeWrapper:
             The response from Claude Code
         """
         try:
-            # Try to get existing event loop
-            loop = asyncio.get_event_loop()
-            if loop.is_closed():
-                # Create new loop if existing one is closed
-                loop = asyncio.new_event_loop()
-                asyncio.set_event_loop(loop)
-        except RuntimeError:
-            # No event loop in current thread, create new one
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-            
-        try:
-            return loop.run_until_complete(self._async_run(with_message))
+            return _run_in_background(self._async_run(with_message))
         except Exception as e:
             if self.verbose:
-                print(f"[ClaudeCodeWrapper] Exception in run(): {e}")
+                logger.debug("Exception in run(): %s", e)
             raise
 
-    async def _async_run(self, prompt: str) -> str:
+    def run_batch(self, prompts: Sequence[str], max_concurrency: int = 8) -> List[str]:
+        """Run independent prompts concurrently (sync wrapper around run_many).
+        
+        Args:
+            prompts: Prompts that don't depend on each other's responses
+            max_concurrency: Maximum number of SDK queries in flight
+            
+        Returns:
+            Responses in the same order as the prompts
+        """
+        return _run_in_background(self.run_many(prompts, max_concurrency))
+
+    async def run_many(self, prompts: Sequence[str], max_concurrency: int = 8) -> List[str]:
+        """Run independent prompts concurrently, overlapping their SDK round-trips.
+        
+        Each prompt starts a fresh conversation, so concurrent sessions in the
+        same working directory don't continue each other's history.
+        
+        Args:
+            prompts: Prompts that don't depend on each other's responses
+            max_concurrency: Maximum number of SDK queries in flight
+            
+        Returns:
+            Responses in the same order as the prompts
+        """
+        semaphore = asyncio.Semaphore(max_concurrency)
+        options = dataclasses.replace(self._options, continue_conversation=False)
+
+        async def run_one(prompt: str) -> str:
+            async with semaphore:
+                return await self._async_run(prompt, options)
+
+        return await asyncio.gather(*(run_one(prompt) for prompt in prompts))
+
+    async def _async_run(self, prompt: str, options: Optional[ClaudeCodeOptions] = None) -> str:
         """Async implementation using Claude Code SDK.
         
         Args:
             prompt: The prompt to send to Claude
+            options: SDK options for this call (default: the wrapper's session options)
             
         Returns:
             The response from Claude Code
         """
-        # Configure SDK options for benchmark execution
-        options = ClaudeCodeOptions(
-            model=self.model,
-            permission_mode=self._get_permission_mode(),  # Auto-approve for benchmark
-            cwd=self.cwd,
-            continue_conversation=True  # For session continuity
-        )
+        if options is None:
+            options = self._options
+
+        # Opt-in response cache: a hit skips the SDK round-trip entirely. Keys are
+        # scoped to the conversation so far, which is empty for a fresh session
+        cache_keys = ()
+        if self._response_cache is not None:
+            context = self._cache_context if options.continue_conversation else ()
+            cache_keys = (
+                LLMCache.key(self.model, self.cwd, prompt, context),
+                LLMCache.normalized_key(self.model, self.cwd, prompt, context),
+            )
+            for cache_key in cache_keys:
+                cached = self._response_cache.get(cache_key)
+                if cached is not None:
+                    if self.verbose:
+                        logger.debug("Response cache hit for %s", cache_key[:12])
+                    # Replay the original call's record, so results match an uncached run
+                    usage = _CallUsage(**{name: value for name, value in cached.usage.items()
+                                          if name in _CallUsage._fields})
+                    self._metrics.api_calls_count += 1
+                    self._add_usage(usage)
+                    self._record_call(prompt, prompt.encode(), cached.response, usage)
+                    self._update_cache_context(prompt, options)
+                    return cached.response
 
         if self.verbose:
-            print(f"[ClaudeCodeWrapper] Sending prompt to {self.model}")
-            print(f"[ClaudeCodeWrapper] Working directory: {self.cwd}")
+            logger.debug("Sending prompt to %s", self.model)
+            logger.debug("Working directory: %s", self.cwd)
 
-        result_text = ""
-        messages_received = []
+        result_parts: List[str] = []  # Joined once after streaming completes
+        n_messages_received = 0
         
         # Track this API call
-        self.api_calls_count += 1
-        call_token_count = self._estimate_tokens(prompt)  # Better token estimation
+        m = self._metrics
+        m.api_calls_count += 1
+        call_usage: Optional[_CallUsage] = None  # Set once this call's ResultMessage arrives
         
         try:
             async for message in query(prompt=prompt, options=options):
-                messages_received.append(message)
+                n_messages_received += 1
+                message_cls = type(message)
                 if self.verbose:
-                    print(f"[ClaudeCodeWrapper] Received message: {type(message).__name__}")
+                    logger.debug("Received message: %s", message_cls.__name__)
 
-                # Extract and update metrics from each message
-                self._update_metrics_from_message(message)
+                # Extract and update metrics; the bulk of the stream is content-only
+                # messages, which skip the extraction entirely
+                if message_cls not in self._CONTENT_ONLY_MESSAGES:
+                    usage = self._update_metrics_from_message(message)
+                    if usage is not None:
+                        call_usage = usage
 
-                # Handle different message types based on the actual SDK structure
-                message_type = type(message).__name__
-                
-                if message_type == 'AssistantMessage':
-                    # Extract text from assistant messages, filtering out tool blocks
-                    if hasattr(message, 'content') and isinstance(message.content, list):
-                        for content_block in message.content:
-                            # Only extract TextBlock content, skip ToolUseBlock
-                            if type(content_block).__name__ == 'TextBlock' and hasattr(content_block, 'text'):
-                                result_text += content_block.text
-                elif message_type == 'UserMessage':
-                    # User messages typically contain tool results, skip for now
-                    pass
-                elif message_type == 'ResultMessage':
-                    # Final result message might contain processed response
-                    if hasattr(message, 'result') and message.result:
-                        if isinstance(message.result, str):
-                            result_text = message.result
+                # Dispatch on the SDK message class; UserMessage (tool results) and
+                # SystemMessage carry no response text and have no handler
+                handler = self._TEXT_HANDLERS.get(message_cls)
+                if handler:
+                    handler(self, message, result_parts)
 
         except Exception as e:
             # Track errors for metrics
             error_str = str(e).lower()
             if "context" in error_str and ("window" in error_str or "length" in error_str or "limit" in error_str):
-                self.num_exhausted_context_windows += 1
+                m.num_exhausted_context_windows += 1
             elif "malformed" in error_str or "invalid" in error_str or "parse" in error_str:
-                self.num_malformed_responses += 1
+                m.num_malformed_responses += 1
                 
             if self.verbose:
-                print(f"[ClaudeCodeWrapper] Error: {e}")
-                print(f"[ClaudeCodeWrapper] Messages received: {len(messages_received)}")
+                logger.debug("Error: %s", e)
+                logger.debug("Messages received: %d", n_messages_received)
             raise
 
+        result_text = "".join(result_parts)
+
         # Only add estimated tokens/cost if we didn't get real data from ResultMessage
-        has_result_message = any(type(msg).__name__ == 'ResultMessage' for msg in messages_received)
-        output_token_count = self._estimate_tokens(result_text)  # Better token estimation
+        prompt_bytes = prompt.encode()  # Encoded once for token counting and hashing
+        result_bytes = result_text.encode()
         
-        if not has_result_message:
+        if call_usage is None:
             # Fallback to estimates if no ResultMessage received
-            self.total_tokens_sent += call_token_count
-            self.total_tokens_received += output_token_count
+            call_token_count = await self._estimate_tokens(prompt, prompt_bytes)
+            output_token_count = await self._estimate_tokens(result_text, result_bytes)
             
             # Use improved cost estimation based on model type
             call_cost = self._estimate_cost(call_token_count, output_token_count)
-            self.total_cost += call_cost
-        else:
-            # We got real data from ResultMessage, use 0 for session tracking
-            call_cost = 0
+            call_usage = _CallUsage(call_token_count, output_token_count, cost=call_cost)
+            self._add_usage(call_usage)
+        # Otherwise we got real data from ResultMessage - already added to the totals
         
+        self._record_call(prompt, prompt_bytes, result_text, call_usage, result_bytes)
+        
+        if self.verbose:
+            logger.debug("Response length: %d chars", len(result_text))
+            logger.debug("Tokens - In: %d, Out: %d", call_usage.input_tokens, call_usage.output_tokens)
+            logger.debug("Call cost: $%.6f", call_usage.cost)
+            logger.debug("Total cost so far: $%.6f", m.total_cost)
+
+        # Only cache responses from calls that completed without an error; the
+        # entry keeps this call's own usage, not a difference of shared totals
+        if cache_keys and not call_usage.is_error:
+            usage = call_usage._asdict()
+            del usage['is_error']
+            for cache_key in cache_keys:
+                self._response_cache.set(cache_key, result_text, usage)
+        if cache_keys:
+            self._update_cache_context(prompt, options)
+
+        return result_text
+
+    def _record_call(self, prompt: str, prompt_bytes: bytes, result_text: str, usage: _CallUsage,
+                     result_bytes: Optional[bytes] = None) -> None:
+        """Append a completed call to the session history and chat hashes.
+        
+        Args:
+            prompt: Prompt sent for the call
+            prompt_bytes: ``prompt`` encoded as UTF-8
+            result_text: Response text of the call
+            usage: Cost and token usage of the call
+            result_bytes: ``result_text`` encoded as UTF-8, if the caller has it
+        """
+        if result_bytes is None:
+            result_bytes = result_text.encode()
+
         # Update session tracking
-        self.session_messages.append({
-            'prompt': prompt[:100] + "..." if len(prompt) > 100 else prompt,
-            'response_length': len(result_text),
-            'tokens_in': call_token_count,
-            'tokens_out': output_token_count,
-            'cost': call_cost
-        })
+        self._session_prompts.append(prompt[:100] + "..." if len(prompt) > 100 else prompt)
+        self._session_response_lengths.append(len(result_text))
+        self._session_tokens_in.append(usage.input_tokens)
+        self._session_tokens_out.append(usage.output_tokens)
+        self._session_costs.append(usage.cost)
         
         # Update hashes for session tracking (simplified)
-        import hashlib
-        call_hash = hashlib.md5(prompt.encode()).hexdigest()[:8]
-        response_hash = hashlib.md5(result_text.encode()).hexdigest()[:8]
-        self.chat_completion_call_hashes.append(call_hash)
-        self.chat_completion_response_hashes.append(response_hash)
+        # 4-byte BLAKE2 digests give the same 8 hex chars as a truncated MD5, faster
+        self.chat_completion_call_hashes.append(hashlib.blake2b(prompt_bytes, digest_size=4).hexdigest())
+        self.chat_completion_response_hashes.append(hashlib.blake2b(result_bytes, digest_size=4).hexdigest())
+        self._trim_session_history()
+
+    def _update_cache_context(self, prompt: str, options: ClaudeCodeOptions) -> None:
+        """Record a completed prompt as context for the next call's cache keys."""
+        if options.continue_conversation:
+            self._cache_context.append(LLMCache.context_hash(prompt))
+            del self._cache_context[:-CONTEXT_CALLS]
+
+    def _trim_session_history(self) -> None:
+        """Trim the session history to the last SESSION_HISTORY_LIMIT calls.
         
-        if self.verbose:
-            print(f"[ClaudeCodeWrapper] Response length: {len(result_text)} chars")
-            print(f"[ClaudeCodeWrapper] Estimated tokens - In: {call_token_count}, Out: {output_token_count}")
-            print(f"[ClaudeCodeWrapper] Estimated cost: ${call_cost:.6f}")
-            print(f"[ClaudeCodeWrapper] Total cost so far: ${self.total_cost:.6f}")
+        Trimming only once the history exceeds twice the limit keeps appends
+        amortized O(1) while the columns stay plain lists and arrays, so a
+        wrapper holds between SESSION_HISTORY_LIMIT and twice that many calls.
+        """
+        if len(self.chat_completion_call_hashes) <= 2 * SESSION_HISTORY_LIMIT:
+            return
+        for column in (self._session_prompts, self._session_response_lengths,
+                       self._session_tokens_in, self._session_tokens_out, self._session_costs,
+                       self.chat_completion_call_hashes, self.chat_completion_response_hashes):
+            del column[:-SESSION_HISTORY_LIMIT]
 
-        return result_text
+    @property
+    def session_messages(self) -> List[Dict]:
+        """Session history as one dict per call (built on demand from the columns)."""
+        return [
+            {'prompt': prompt, 'response_length': response_length,
+             'tokens_in': tokens_in, 'tokens_out': tokens_out, 'cost': cost}
+            for prompt, response_length, tokens_in, tokens_out, cost in zip(
+                self._session_prompts, self._session_response_lengths,
+                self._session_tokens_in, self._session_tokens_out, self._session_costs)
+        ]
 
     def set_cwd(self, cwd: Path) -> None:
         """Set the current working directory.
@@ -405,9 +927,11 @@ class ClaudeCodeWrapper:
         Args:
             cwd: New working directory path
         """
-        self.cwd = Path(cwd)
+        self.cwd = cwd if isinstance(cwd, Path) else Path(cwd)
+        if self.cwd != self._options.cwd:
+            self._options = dataclasses.replace(self._options, cwd=self.cwd)
         if self.verbose:
-            print(f"[ClaudeCodeWrapper] Changed working directory to: {self.cwd}")
+            logger.debug("Changed working directory to: %s", self.cwd)
 
     def show_announcements(self) -> None:
         """Show announcements (compatibility method for aider interface)."""
@@ -422,11 +946,11 @@ class ClaudeCodeWrapper:
         return set()
 
     @classmethod
-    def get_supported_models(cls) -> Dict[str, str]:
+    def get_supported_models(cls) -> Mapping[str, str]:
         """Get all supported model mappings.
         
         Returns:
-            Dictionary of supported model identifiers and their Claude Code equivalents
+            Read-only mapping of supported model identifiers to their Claude Code equivalents
         """
         return get_available_models()
     
@@ -448,19 +972,25 @@ class ClaudeCodeWrapper:
 
 # Factory function to match aider's Coder.create() pattern
 def create_claude_code_wrapper(model: str = ClaudeModel.get_default().value,
-                               verbose: bool = False) -> ClaudeCodeWrapper:
+                               verbose: bool = False,
+                               exact_tokens: bool = False,
+                               skip_auth_check: bool = False,
+                               continue_conversation: bool = True) -> ClaudeCodeWrapper:
     """Factory function to create ClaudeCodeWrapper instance.
     
     Args:
         model: Claude model to use
         verbose: Enable verbose logging
+        exact_tokens: Count tokens via the Anthropic API instead of the local tokenizer
+        skip_auth_check: Skip the authentication probe
+        continue_conversation: Continue the working directory's most recent conversation
         
     Returns:
         ClaudeCodeWrapper instance
     """
-    return ClaudeCodeWrapper(model=model, verbose=verbose)
+    return ClaudeCodeWrapper(model=model, verbose=verbose, exact_tokens=exact_tokens,
+                             skip_auth_check=skip_auth_check, continue_conversation=continue_conversation)
 
 
 if __name__ == "__main__":
-    from .models import print_available_models
     print_available_models()
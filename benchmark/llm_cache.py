@@ -0,0 +1,148 @@
+"""Response cache for ClaudeCodeWrapper prompts.
+
+Lookups try the exact prompt first, then a normalized form that ignores case
+and whitespace differences. Both keys are scoped to the recent conversation
+context, so a follow-up never matches an answer given after another history.
+
+Disabled by default. On a hit the Claude Code SDK is not invoked at all, so no
+files are edited in the working directory - only enable it for reruns where
+reusing the response text is enough (e.g. CLI/text-only experiments). Entries
+also record the cost and token counts of the original call, which the wrapper
+adds back to its metrics on a hit.
+"""
+import hashlib
+import json
+import os
+import time
+from pathlib import Path
+from typing import Dict, NamedTuple, Optional, Sequence
+
+# Set to "1" to enable the response cache
+CACHE_ENV_VAR = "CC_BENCHMARK_CACHE"
+# Overrides the cache directory (default: <CC_BENCHMARK_DIR>/.llm_cache)
+CACHE_DIR_ENV_VAR = "CC_BENCHMARK_CACHE_DIR"
+# Entry lifetime in seconds (default: never expire)
+CACHE_TTL_ENV_VAR = "CC_BENCHMARK_CACHE_TTL"
+# Number of preceding call hashes that scope a normalized-key match
+CONTEXT_CALLS = 3
+
+
+class CachedResponse(NamedTuple):
+    """A cached response and the cost and token usage of its original call."""
+    response: str
+    usage: Dict[str, float]
+
+
+class LLMCache:
+    """Response cache stored as one JSON file per entry, sharded by key prefix."""
+
+    def __init__(self, directory: Path, ttl: Optional[float] = None):
+        """Initialize the cache.
+
+        Args:
+            directory: Directory holding the cache shards (created on first write)
+            ttl: Seconds an entry stays valid, or None to never expire
+        """
+        self.directory = Path(directory)
+        self.ttl = ttl
+
+    @classmethod
+    def from_env(cls) -> Optional["LLMCache"]:
+        """Build the cache from environment variables, or return None if disabled.
+
+        Raises:
+            ValueError: If CC_BENCHMARK_CACHE_TTL is set but not a number of seconds
+        """
+        if os.environ.get(CACHE_ENV_VAR) != "1":
+            return None
+        default_dir = Path(os.environ.get("CC_BENCHMARK_DIR", "tmp.benchmarks")) / ".llm_cache"
+        directory = Path(os.environ.get(CACHE_DIR_ENV_VAR, default_dir))
+        ttl = os.environ.get(CACHE_TTL_ENV_VAR)
+        if not ttl:
+            return cls(directory)
+        try:
+            return cls(directory, float(ttl))
+        except ValueError:
+            raise ValueError(f"{CACHE_TTL_ENV_VAR} must be a number of seconds, got {ttl!r}") from None
+
+    @staticmethod
+    def normalize(prompt: str) -> str:
+        """Return the form of a prompt that ignores case and whitespace differences."""
+        return " ".join(prompt.split()).casefold()
+
+    @staticmethod
+    def context_hash(prompt: str) -> str:
+        """Return the hash recording a prompt in the context of the calls after it."""
+        return hashlib.blake2b(LLMCache.normalize(prompt).encode(), digest_size=8).hexdigest()
+
+    @staticmethod
+    def key(model: str, cwd: Path, prompt: str, context: Sequence[str] = ()) -> str:
+        """Return the cache key for a prompt sent to a model from a working directory.
+
+        Args:
+            model: Model the prompt is sent to
+            cwd: Working directory of the call
+            prompt: Prompt text
+            context: context_hash() of the preceding calls in the conversation, so
+                a follow-up only matches when asked after the same history
+
+        Returns:
+            Hex digest identifying the prompt in its context
+        """
+        payload = json.dumps({"model": model, "cwd": str(cwd), "prompt": prompt,
+                              "context": list(context)}, sort_keys=True)
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    @staticmethod
+    def normalized_key(model: str, cwd: Path, prompt: str, context: Sequence[str] = ()) -> str:
+        """Return a key that matches prompts differing only in case or whitespace.
+
+        Takes the same arguments as key(); the context hashes are already
+        normalized, so a replay with drifted whitespace keeps matching.
+        """
+        return LLMCache.key(model, cwd, LLMCache.normalize(prompt), context)
+
+    def _path(self, key: str) -> Path:
+        return self.directory / key[:2] / f"{key}.json"
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        """Return the cached entry for a key, or None on a miss or expired entry."""
+        path = self._path(key)
+        try:
+            entry = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+        if not isinstance(entry, dict):
+            return None
+
+        expires_at = entry.get("expires_at")
+        if expires_at is not None and expires_at < time.time():
+            path.unlink(missing_ok=True)
+            return None
+        response = entry.get("response")
+        if response is None:
+            return None
+        return CachedResponse(response, entry.get("usage") or {})
+
+    def set(self, key: str, response: str, usage: Optional[Dict[str, float]] = None) -> None:
+        """Store a response under a key.
+
+        Args:
+            key: Cache key from key() or normalized_key()
+            response: Response text
+            usage: Cost and token usage of the call that produced the response
+                (e.g. {"cost": 0.01, "input_tokens": 120, "output_tokens": 40})
+        """
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        expires_at = time.time() + self.ttl if self.ttl is not None else None
+        # Write to a temp file and rename so concurrent readers never see a partial entry
+        tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+        tmp_path.write_text(json.dumps({"response": response, "usage": usage or {},
+                                        "expires_at": expires_at}), encoding="utf-8")
+        os.replace(tmp_path, path)
+
+    def clear(self) -> None:
+        """Remove every cached entry."""
+        for path in self.directory.glob("*/*.json"):
+            path.unlink(missing_ok=True)
@@ -1,6 +1,9 @@
 """Claude Code model definitions and utilities."""
+import sys
+from collections import defaultdict
 from enum import Enum, unique
-from typing import Dict, List, Optional
+from types import MappingProxyType
+from typing import DefaultDict, Dict, List, Mapping, Optional, Tuple
 
 # Model validation moved to tests/model_sync_checker.py
 
@@ -44,126 +47,146 @@ class ClaudeModel(Enum):
 
     @classmethod
     def from_string(cls, model_name: str) -> Optional['ClaudeModel']:
-        for model in cls:
-            if model.value == model_name:
-                return model
-        return None
+        return cls._value2member_map_.get(model_name)
 
     @classmethod
     def from_common_name(cls, name: str) -> Optional['ClaudeModel']:
         """Resolve common model names to specific model instances."""
-        name_lower = name.lower()
-        
-        # Map common names to preferred models (using latest versions)
-        if name_lower == "sonnet":
-            return cls.SONNET_4  # Default to Claude 4 Sonnet
-        elif name_lower in ("sonnet-4", "sonnet4"):
-            return cls.SONNET_4
-        elif name_lower in ("sonnet-3.5", "sonnet3.5"):
-            return cls.SONNET_3_5_LATEST
-        elif name_lower == "haiku":
-            return cls.HAIKU_3_5_LATEST  # Default to 3.5 Haiku
-        elif name_lower in ("haiku-3.5", "haiku3.5"):
-            return cls.HAIKU_3_5_LATEST
-        elif name_lower == "opus":
-            return cls.OPUS_4  # Default to Claude 4 Opus
-        elif name_lower in ("opus-4", "opus4"):
-            return cls.OPUS_4
-        elif name_lower in ("opus-3", "opus3"):
-            return cls.OPUS_3_LATEST
-            
-        return None
+        return _resolve_common_name(name)
 
     @classmethod
     def lookup_any(cls, model_name: str) -> Optional['ClaudeModel']:
-        model = cls.from_string(model_name)
-        if model:
-            return model
-        model = cls.from_common_name(model_name)
-        if model:
-            return model
-        return None
+        # Lowercase only after an exact miss; IDs themselves stay case-sensitive
+        return _MODEL_LOOKUP.get(model_name) or _resolve_common_name(model_name)
 
     @classmethod
     def list_all_ids(cls) -> List[str]:
-        return [model.value for model in cls]
+        # New list per call so callers may modify it
+        return list(_ALL_IDS)
 
     def __str__(self) -> str:
         return self.value
 
 
+# Enum members are fixed at class creation, so their IDs are computed once
+_ALL_IDS: Tuple[str, ...] = tuple(model.value for model in ClaudeModel)
+
+# Model list shown when an identifier can't be resolved
+_AVAILABLE_MODELS_HINT = str([*_ALL_IDS, "sonnet", "haiku", "opus"])
+
+# Map common names to preferred models (using latest versions)
+_COMMON_NAMES: Dict[str, ClaudeModel] = {
+    "sonnet": ClaudeModel.SONNET_4,  # Default to Claude 4 Sonnet
+    "sonnet-4": ClaudeModel.SONNET_4,
+    "sonnet-3.5": ClaudeModel.SONNET_3_5_LATEST,
+    "haiku": ClaudeModel.HAIKU_3_5_LATEST,  # Default to 3.5 Haiku
+    "haiku-3.5": ClaudeModel.HAIKU_3_5_LATEST,
+    "opus": ClaudeModel.OPUS_4,  # Default to Claude 4 Opus
+    "opus-4": ClaudeModel.OPUS_4,
+    "opus-3": ClaudeModel.OPUS_3_LATEST,
+}
+# Also accept the undashed spellings (e.g. "sonnet4"); these aren't listed as aliases
+_COMMON_NAME_LOOKUP: Dict[str, ClaudeModel] = {
+    **_COMMON_NAMES,
+    **{name.replace("-", ""): model for name, model in _COMMON_NAMES.items()},
+}
+# Exact-match lookup for both model IDs and common names
+_MODEL_LOOKUP: Dict[str, ClaudeModel] = {
+    **ClaudeModel._value2member_map_,
+    **_COMMON_NAME_LOOKUP,
+}
+# Plain-string form of _MODEL_LOOKUP, so lookup_model() never touches enum members
+_RESOLVED_IDS: Dict[str, str] = {name: model.value for name, model in _MODEL_LOOKUP.items()}
+# Full model IDs followed by the common name aliases, built once at import (read-only)
+_AVAILABLE_MODELS: Mapping[str, str] = MappingProxyType({
+    **{model_id: model_id for model_id in _ALL_IDS},
+    **{name: model.value for name, model in _COMMON_NAMES.items()},
+})
+
+
+def _resolve_common_name(name: str) -> Optional[ClaudeModel]:
+    """Case-insensitive common-name lookup shared by the ClaudeModel shims and lookup_model()."""
+    # CLI input is usually lowercase already; skip the copy then
+    return _COMMON_NAME_LOOKUP.get(name if name.islower() else name.lower())
+
+
 def lookup_model(model_name: str) -> str:
-    model = ClaudeModel.lookup_any(model_name)
+    # Canonical IDs and common names resolve with a single dict lookup
+    resolved = _RESOLVED_IDS.get(model_name)
+    if resolved:
+        return resolved
+    # Other claude-* IDs pass through; no alias starts with "claude-"
+    if model_name.startswith("claude-"):
+        return model_name
+    # Case-insensitive common names (e.g. "Sonnet", "OPUS-4")
+    model = _resolve_common_name(model_name)
     if model:
         return model.value
 
-    if model_name.startswith("claude-"):
-        return model_name
-    available_models = ClaudeModel.list_all_ids() + ["sonnet", "haiku", "opus"]
-    raise ValueError(f"Unknown model identifier: {model_name}. Available models: {available_models}")
+    raise ValueError(f"Unknown model identifier: {model_name}. Available models: {_AVAILABLE_MODELS_HINT}")
 
 
-def get_available_models() -> Dict[str, str]:
-    mappings = {}
+def get_available_models() -> Mapping[str, str]:
+    # Read-only view, so the shared table is returned without copying
+    return _AVAILABLE_MODELS
 
-    # Add full model IDs
-    for model in ClaudeModel:
-        mappings[model.value] = model.value
 
-    # Add common name aliases (pointing to latest/recommended versions)
-    mappings["sonnet"] = ClaudeModel.SONNET_4.value
-    mappings["sonnet-4"] = ClaudeModel.SONNET_4.value
-    mappings["sonnet-3.5"] = ClaudeModel.SONNET_3_5_LATEST.value
-    mappings["haiku"] = ClaudeModel.HAIKU_3_5_LATEST.value
-    mappings["haiku-3.5"] = ClaudeModel.HAIKU_3_5_LATEST.value
-    mappings["opus"] = ClaudeModel.OPUS_4.value
-    mappings["opus-4"] = ClaudeModel.OPUS_4.value
-    mappings["opus-3"] = ClaudeModel.OPUS_3_LATEST.value
+# Sections of print_available_models(), in display order
+_MODEL_FAMILIES = (
+    "Claude 4 Sonnet Models (Latest)",
+    "Claude 3.7 Sonnet Models",
+    "Claude 3.5 Sonnet Models",
+    "Claude 3.5 Haiku Models",
+    "Claude 3 Legacy Models",
+    "Claude 4 Opus Models",
+    "Common Name Aliases",
+)
 
-    return mappings
+
+def _family_of(model_name: str) -> Optional[str]:
+    """Return the print_available_models() section for a model ID or alias."""
+    name_lower = model_name.lower()
+    
+    # Categorize by model family and generation
+    if name_lower.startswith("claude-sonnet-4") or name_lower == "sonnet":
+        return "Claude 4 Sonnet Models (Latest)"
+    elif "sonnet" in name_lower and ("3.7" in name_lower or "3-7" in name_lower):
+        return "Claude 3.7 Sonnet Models"
+    elif "sonnet" in name_lower and ("3.5" in name_lower or "3-5" in name_lower):
+        return "Claude 3.5 Sonnet Models"
+    elif "haiku" in name_lower and ("3.5" in name_lower or "3-5" in name_lower):
+        return "Claude 3.5 Haiku Models"
+    elif ("haiku" in name_lower and "3-" in name_lower) or ("opus" in name_lower and "3-" in name_lower):
+        return "Claude 3 Legacy Models"
+    elif "opus" in name_lower and ("4" in name_lower or name_lower == "opus"):
+        return "Claude 4 Opus Models"
+    elif name_lower in _COMMON_NAMES:
+        return "Common Name Aliases"
+    return None
+
+
+# Section of every listed model, categorized once at import
+_FAMILY: Dict[str, str] = {
+    name: family for name in _AVAILABLE_MODELS if (family := _family_of(name)) is not None
+}
 
 
 def print_available_models() -> None:
     """Print all available model mappings in a user-friendly format."""
-    print("Available Claude Code Models:")
-    print("=" * 50)
-
-    models = get_available_models()
-
-    families = {
-        "Claude 4 Sonnet Models (Latest)": [],
-        "Claude 3.7 Sonnet Models": [],
-        "Claude 3.5 Sonnet Models": [],
-        "Claude 3.5 Haiku Models": [],
-        "Claude 3 Legacy Models": [],
-        "Claude 4 Opus Models": [],
-        "Common Name Aliases": [],
-    }
-
-    for original, resolved in models.items():
-        original_lower = original.lower()
-        
-        # Categorize by model family and generation
-        if original_lower.startswith("claude-sonnet-4") or original_lower == "sonnet":
-            families["Claude 4 Sonnet Models (Latest)"].append((original, resolved))
-        elif "sonnet" in original_lower and ("3.7" in original_lower or "3-7" in original_lower):
-            families["Claude 3.7 Sonnet Models"].append((original, resolved))  
-        elif "sonnet" in original_lower and ("3.5" in original_lower or "3-5" in original_lower):
-            families["Claude 3.5 Sonnet Models"].append((original, resolved))
-        elif "haiku" in original_lower and ("3.5" in original_lower or "3-5" in original_lower):
-            families["Claude 3.5 Haiku Models"].append((original, resolved))
-        elif ("haiku" in original_lower and "3-" in original_lower) or ("opus" in original_lower and "3-" in original_lower):
-            families["Claude 3 Legacy Models"].append((original, resolved))
-        elif "opus" in original_lower and ("4" in original_lower or original_lower == "opus"):
-            families["Claude 4 Opus Models"].append((original, resolved))
-        elif original_lower in ["sonnet", "haiku", "opus", "sonnet-4", "sonnet-3.5", "haiku-3.5", "opus-4", "opus-3"]:
-            families["Common Name Aliases"].append((original, resolved))
-
-    for family, mappings in families.items():
-        if mappings:
-            print(f"\n{family}:")
-            for original, resolved in mappings:
-                print(f"  {original:<30} -> {resolved}")
+    families: DefaultDict[str, List[Tuple[str, str]]] = defaultdict(list)
+    for original, resolved in get_available_models().items():
+        family = _FAMILY.get(original)
+        if family:
+            families[family].append((original, resolved))
+
+    lines = ["Available Claude Code Models:", "=" * 50]
+    for family in _MODEL_FAMILIES:
+        if family in families:
+            lines.append(f"\n{family}:")
+            lines.extend(f"  {original:<30} -> {resolved}" for original, resolved in families[family])
+
+    # Written in one call rather than one print() per line
+    sys.stdout.write("\n".join(lines) + "\n")
 
 
 if __name__ == "__main__":
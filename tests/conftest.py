@@ -3,10 +3,14 @@ import sys
 import pytest
 from pathlib import Path
 
-# Add benchmark directory to path for all tests
-benchmark_dir = Path(__file__).parent.parent / "benchmark"
-if str(benchmark_dir) not in sys.path:
-    sys.path.insert(0, str(benchmark_dir))
+# Add the benchmark directory and project root to path once for all tests; the
+# root goes first so "benchmark" resolves to the package, not benchmark/benchmark.py
+root_dir = Path(__file__).parent.parent
+benchmark_dir = root_dir / "benchmark"
+for path in (str(benchmark_dir), str(root_dir)):
+    if path in sys.path:
+        sys.path.remove(path)
+    sys.path.insert(0, path)
 
 
 def pytest_configure(config):
@@ -21,14 +25,18 @@ def pytest_configure(config):
 
 def pytest_collection_modifyitems(config, items):
     """Modify test collection to add markers based on test names."""
+    # Marker objects are looked up once rather than per item
+    slow, model_sync = pytest.mark.slow, pytest.mark.model_sync
     for item in items:
+        name = item.name.lower()
+        
         # Add slow marker to potentially slow tests
-        if "sync" in item.name.lower() or "integration" in item.name.lower():
-            item.add_marker(pytest.mark.slow)
+        if "sync" in name or "integration" in name:
+            item.add_marker(slow)
         
         # Auto-mark model sync tests
-        if "model" in item.name.lower():
-            item.add_marker(pytest.mark.model_sync)
+        if "model" in name:
+            item.add_marker(model_sync)
 
 
 @pytest.fixture(scope="session")
@@ -1,58 +1,75 @@
 #!/usr/bin/env python3
 """Model synchronization checker to detect changes in Anthropic SDK models."""
-from typing import Dict, List, Set, Optional
+import argparse
+import functools
+from typing import Dict, FrozenSet, List, Set, Optional
 from datetime import datetime
 
-# Required dependency for model synchronization
-from anthropic.types import Model
+# Needed to check for model changes; without it the checker reports that it can't check
+try:
+    from anthropic.types import Model
+except ImportError:
+    Model = None
 
 # Import our local models for comparison
 from benchmark.models import ClaudeModel
 
 
+@functools.lru_cache(maxsize=1)
+def _anthropic_models_cached() -> Optional[FrozenSet[str]]:
+    """Extract model identifiers from Anthropic SDK (reflected once per process)."""
+    try:
+        # Get all model constants from Model type
+        # This is a union type, so we need to extract the literal values
+        
+        # Get the union arguments (model string literals)
+        if hasattr(Model, '__args__'):
+            model_literals = []
+            for arg in Model.__args__:
+                if hasattr(arg, '__args__'):  # Literal type
+                    model_literals.extend(arg.__args__)
+                elif isinstance(arg, str):
+                    model_literals.append(arg)
+            return frozenset(model_literals)
+        else:
+            # Fallback: try to get from type annotations
+            return None
+            
+    except Exception as e:
+        print(f"⚠️  Could not extract Anthropic models: {e}")
+        return None
+
+
+@functools.lru_cache(maxsize=1)
+def _our_models_cached() -> FrozenSet[str]:
+    """Get our model constants from ClaudeModel enum (fixed at import)."""
+    return frozenset(ClaudeModel._value2member_map_)
+
+
 class ModelSyncChecker:
     """Checks for changes between our model constants and Anthropic SDK."""
     
     def _get_anthropic_models(self) -> Optional[List[str]]:
         """Extract model identifiers from Anthropic SDK."""
-            
-        try:
-            # Get all model constants from Model type
-            # This is a union type, so we need to extract the literal values
-            import typing
-            
-            # Get the union arguments (model string literals)
-            if hasattr(Model, '__args__'):
-                model_literals = []
-                for arg in Model.__args__:
-                    if hasattr(arg, '__args__'):  # Literal type
-                        model_literals.extend(arg.__args__)
-                    elif isinstance(arg, str):
-                        model_literals.append(arg)
-                return sorted(list(set(model_literals)))
-            else:
-                # Fallback: try to get from type annotations
-                return None
-                
-        except Exception as e:
-            print(f"⚠️  Could not extract Anthropic models: {e}")
-            return None
+        anthropic_models = _anthropic_models_cached()
+        return sorted(anthropic_models) if anthropic_models is not None else None
     
     def _get_our_models(self) -> List[str]:
         """Get our current model constants from ClaudeModel enum."""
-        return sorted([model.value for model in ClaudeModel])
+        return sorted(_our_models_cached())
     
     
     def check_for_changes(self, verbose: bool = True) -> Dict:
         """Check for changes in model lists."""
         check_time = datetime.now().isoformat()
+        our_models = _our_models_cached()
         result = {
             "timestamp": check_time,
             "anthropic_available": True,
             "changes_detected": False,
             "new_models": [],
             "removed_models": [],
-            "our_models_count": len(self._get_our_models()),
+            "our_models_count": len(our_models),
             "anthropic_models_count": 0,
             "recommendations": []
         }
@@ -62,29 +79,28 @@ class ModelSyncChecker:
             print("=" * 30)
             print(f"Timestamp: {check_time}")
         
-        our_models = set(self._get_our_models())
-        anthropic_models = self._get_anthropic_models()
+        anthropic_models = _anthropic_models_cached()
         
         if anthropic_models is None:
+            result["anthropic_available"] = False
             if verbose:
                 print("⚠️  Anthropic SDK not available - cannot check for changes")
                 print("   Install with: uv add anthropic")
             result["recommendations"].append("Install Anthropic SDK to enable model sync checking")
             return result
         
-        anthropic_models_set = set(anthropic_models)
         result["anthropic_models_count"] = len(anthropic_models)
         
         if verbose:
             print(f"📊 Our models: {len(our_models)}")
             print(f"📊 Anthropic models: {len(anthropic_models)}")
         
-        # Check for changes
-        new_models = anthropic_models_set - our_models
-        removed_models = our_models - anthropic_models_set
+        # Check for changes; each difference is sorted once and reused for printing
+        new_models = sorted(anthropic_models - our_models)
+        removed_models = sorted(our_models - anthropic_models)
         
-        result["new_models"] = sorted(list(new_models))
-        result["removed_models"] = sorted(list(removed_models))
+        result["new_models"] = new_models
+        result["removed_models"] = removed_models
         result["changes_detected"] = bool(new_models or removed_models)
         
         if verbose:
@@ -93,12 +109,12 @@ class ModelSyncChecker:
                 
                 if new_models:
                     print(f"\n✅ NEW MODELS ({len(new_models)}):")
-                    for model in sorted(new_models):
+                    for model in new_models:
                         print(f"   + {model}")
                         
                 if removed_models:
                     print(f"\n❌ REMOVED MODELS ({len(removed_models)}):")
-                    for model in sorted(removed_models):
+                    for model in removed_models:
                         print(f"   - {model}")
                         
                 result["recommendations"].extend([
@@ -123,7 +139,7 @@ class ModelSyncChecker:
         our_models = self._get_our_models()
         return {
             "our_models_count": len(our_models),
-            "anthropic_available": True
+            "anthropic_available": Model is not None
         }
     
     def generate_update_guide(self) -> str:
@@ -144,17 +160,18 @@ class ClaudeModel(Enum):
 ## 2. Update cost estimation
 Check if new models need different pricing in cc_wrapper.py:
 ```python
-def _estimate_cost(self, input_tokens: int, output_tokens: int) -> float:
-    # Add pricing for new model families
+MODEL_PRICING = {
+    # Add (input, output) per-token pricing for new model families
+}
 ```
 
 ## 3. Update common name mappings
-Add user-friendly aliases in from_common_name() and get_available_models().
+Add user-friendly aliases to _COMMON_NAMES in models.py (used by from_common_name() and get_available_models()).
 
 ## 4. Test the changes
 Run the model sync checker again to verify sync:
 ```bash
-python tests/model_sync_checker.py
+python -m tests.model_sync_checker
 ```
 """
         return guide
@@ -162,12 +179,6 @@ python tests/model_sync_checker.py
 
 def main():
     """Main CLI interface for model sync checking."""
-    # Validate Anthropic models dependency
-    from benchmark.deps import validate_anthropic_models
-    validate_anthropic_models()
-    
-    import argparse
-    
     parser = argparse.ArgumentParser(description="Check for changes in Anthropic model list")
     parser.add_argument("--verbose", "-v", action="store_true", help="Verbose output")
     parser.add_argument("--status", "-s", action="store_true", help="Show sync status only")
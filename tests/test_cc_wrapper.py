@@ -0,0 +1,326 @@
+"""Tests for ClaudeCodeWrapper metrics, with the Claude Code SDK query stubbed out."""
+import asyncio
+import importlib.util
+import logging
+from collections import OrderedDict
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+# cc_wrapper imports these at module level
+pytest.importorskip("claude_code_sdk")
+pytest.importorskip("tiktoken")
+pytest.importorskip("anthropic")
+
+import cc_wrapper
+from claude_code_sdk import AssistantMessage, ResultMessage, TextBlock
+from cc_wrapper import ClaudeCodeWrapper
+
+
+def _result_message(result: str, cost: float, input_tokens: int, output_tokens: int) -> ResultMessage:
+    return ResultMessage(
+        subtype="success", duration_ms=1, duration_api_ms=1, is_error=False, num_turns=1,
+        session_id="test-session", total_cost_usd=cost,
+        usage={"input_tokens": input_tokens, "output_tokens": output_tokens}, result=result
+    )
+
+
+@pytest.fixture
+def sdk_prompts(monkeypatch):
+    """Stub the SDK so each query costs $1 and uses 100 input / 20 output tokens.
+
+    Returns the list of prompts that reached the SDK.
+    """
+    prompts = []
+
+    async def fake_query(prompt, options):
+        prompts.append(prompt)
+        yield AssistantMessage(content=[TextBlock(text=f"answer to {prompt}")])
+        yield _result_message(f"answer to {prompt}", 1.0, 100, 20)
+
+    monkeypatch.setattr(cc_wrapper, "query", fake_query)
+    return prompts
+
+
+@pytest.fixture
+def wrapper(monkeypatch, sdk_prompts):
+    """Wrapper with the response cache disabled."""
+    monkeypatch.delenv("CC_BENCHMARK_CACHE", raising=False)
+    return ClaudeCodeWrapper(skip_auth_check=True)
+
+
+class FakeEncoder:
+    """Whitespace tokenizer recording every text it encodes."""
+
+    def __init__(self):
+        self.texts = []
+
+    def encode(self, text, disallowed_special=()):
+        self.texts.append(text)
+        return text.split()
+
+
+class FakeCountClient:
+    """Anthropic client stand-in whose count_tokens returns the text length."""
+
+    def __init__(self, error=None):
+        self.error = error
+        self.messages = SimpleNamespace(count_tokens=self._count_tokens)
+
+    def _count_tokens(self, model, messages):
+        if self.error:
+            raise self.error
+        return SimpleNamespace(input_tokens=len(messages[0]["content"]))
+
+
+@pytest.fixture
+def encoder(monkeypatch):
+    """Install a fake local tokenizer and an empty token count cache."""
+    fake = FakeEncoder()
+    monkeypatch.setattr(cc_wrapper, "_local_tokenizer", lambda: fake)
+    monkeypatch.setattr(cc_wrapper, "_token_cache", OrderedDict())
+    return fake
+
+
+@pytest.fixture
+def make_cached_wrapper(monkeypatch, tmp_path, sdk_prompts):
+    """Factory for wrappers sharing one response cache directory."""
+    monkeypatch.setenv("CC_BENCHMARK_CACHE", "1")
+    monkeypatch.setenv("CC_BENCHMARK_CACHE_DIR", str(tmp_path / "cache"))
+    monkeypatch.delenv("CC_BENCHMARK_CACHE_TTL", raising=False)
+    return lambda: ClaudeCodeWrapper(skip_auth_check=True)
+
+
+@pytest.mark.unit
+class TestCallMetrics:
+    """Each call's ResultMessage usage is added to the wrapper totals."""
+
+    def test_run_accumulates(self, wrapper):
+        wrapper.run("first")
+        wrapper.run("second")
+
+        assert wrapper.total_cost == pytest.approx(2.0)
+        assert wrapper.total_tokens_sent == 200
+        assert wrapper.total_tokens_received == 40
+        assert wrapper.api_calls_count == 2
+
+    def test_batch_totals(self, wrapper):
+        responses = wrapper.run_batch([f"prompt {i}" for i in range(5)], max_concurrency=3)
+
+        assert responses == [f"answer to prompt {i}" for i in range(5)]
+        assert wrapper.total_cost == pytest.approx(5.0)
+        assert wrapper.total_tokens_sent == 500
+        assert wrapper.total_tokens_received == 100
+        assert wrapper.api_calls_count == 5
+        assert [message["cost"] for message in wrapper.session_messages] == [1.0] * 5
+
+    def test_session_history_trimmed_past_twice_the_limit(self, wrapper, monkeypatch):
+        monkeypatch.setattr(cc_wrapper, "SESSION_HISTORY_LIMIT", 2)
+        for i in range(4):
+            wrapper.run(f"prompt {i}")
+        assert len(wrapper.chat_completion_call_hashes) == 4
+
+        wrapper.run("prompt 4")
+
+        assert [message["prompt"] for message in wrapper.session_messages] == ["prompt 3", "prompt 4"]
+        assert len(wrapper.chat_completion_call_hashes) == len(wrapper.chat_completion_response_hashes) == 2
+        assert wrapper.api_calls_count == 5
+
+
+@pytest.mark.unit
+class TestResponseCache:
+    """Cache hits are scoped to the conversation and keep its history intact."""
+
+    def test_follow_up_after_other_history_misses(self, make_cached_wrapper, sdk_prompts):
+        first = make_cached_wrapper()
+        first.run("What is 2 + 2?")
+        first.run("Now double it")
+
+        second = make_cached_wrapper()
+        second.run("What is 3 + 3?")
+        second.run("Now double it")
+
+        assert sdk_prompts == ["What is 2 + 2?", "Now double it", "What is 3 + 3?", "Now double it"]
+
+    def test_same_history_hits(self, make_cached_wrapper, sdk_prompts):
+        prompts = ["What is 2 + 2?", "Now double it", "And halve that"]
+        original = make_cached_wrapper()
+        for prompt in prompts:
+            original.run(prompt)
+
+        replay = make_cached_wrapper()
+        responses = [replay.run(prompt) for prompt in prompts]
+
+        assert sdk_prompts == prompts
+        assert responses == [f"answer to {prompt}" for prompt in prompts]
+        assert replay.chat_completion_call_hashes == original.chat_completion_call_hashes
+
+    def test_dev_test_rerun_makes_no_sdk_calls(self, make_cached_wrapper, sdk_prompts, monkeypatch, tmp_path):
+        path = Path(__file__).parent.parent / "dev-tests" / "test_claude_code_integration.py"
+        spec = importlib.util.spec_from_file_location("dev_integration_tests", path)
+        dev_tests = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(dev_tests)
+        monkeypatch.setattr(dev_tests, "DEV_TEST_DIR", tmp_path / "work")
+        monkeypatch.setattr(dev_tests, "query", cc_wrapper.query)
+        monkeypatch.setattr(cc_wrapper, "_AUTH_VERIFIED", {cc_wrapper._auth_cache_key()})
+        # The Integration test edits files, so it runs live on every run by design
+        tests = [("SDK Direct", dev_tests.test_sdk_direct),
+                 ("Wrapper", dev_tests.test_wrapper_functionality),
+                 ("Metrics", dev_tests.test_metrics_validation)]
+
+        first = asyncio.run(dev_tests.run_tests(tests))
+        live_calls = list(sdk_prompts)
+        second = asyncio.run(dev_tests.run_tests(tests))
+
+        assert len(live_calls) == 5
+        assert sdk_prompts == live_calls
+        assert first == second == [(name, True) for name, _ in tests]
+
+    def test_whitespace_drifted_replay_hits(self, make_cached_wrapper, sdk_prompts):
+        prompts = ["What is 2 + 2?", "Now double it", "And halve that"]
+        original = make_cached_wrapper()
+        for prompt in prompts:
+            original.run(prompt)
+
+        replay = make_cached_wrapper()
+        for prompt in ["what is  2 + 2?", "Now double\nit ", "AND halve that"]:
+            replay.run(prompt)
+
+        assert sdk_prompts == prompts
+        assert len(replay.chat_completion_call_hashes) == len(prompts)
+
+    def test_replay_restores_full_record(self, make_cached_wrapper, sdk_prompts, monkeypatch):
+        async def fake_query(prompt, options):
+            sdk_prompts.append(prompt)
+            yield _result_message(f"answer to {prompt}", len(prompt) / 100, len(prompt), 2 * len(prompt))
+
+        monkeypatch.setattr(cc_wrapper, "query", fake_query)
+        prompts = ["What is 2 + 2?", "Now double it", "And halve that, please"]
+        original = make_cached_wrapper()
+        for prompt in prompts:
+            original.run(prompt)
+
+        replay = make_cached_wrapper()
+        for prompt in prompts:
+            replay.run(prompt)
+
+        assert sdk_prompts == prompts
+        assert replay.total_cost == pytest.approx(original.total_cost)
+        assert replay.total_tokens_sent == original.total_tokens_sent
+        assert replay.total_tokens_received == original.total_tokens_received
+        assert replay.api_calls_count == original.api_calls_count == 3
+        assert replay.session_messages == original.session_messages
+        assert replay.chat_completion_call_hashes == original.chat_completion_call_hashes
+        assert replay.chat_completion_response_hashes == original.chat_completion_response_hashes
+
+
+@pytest.mark.unit
+class TestBackgroundLoop:
+    """All wrappers share one background loop, however many threads start it."""
+
+    def test_concurrent_first_use_starts_one_loop(self, monkeypatch):
+        from concurrent.futures import ThreadPoolExecutor
+
+        monkeypatch.setattr(cc_wrapper, "_loop", None)
+        started = []
+        start = cc_wrapper._start_background_loop
+        monkeypatch.setattr(cc_wrapper, "_start_background_loop", lambda: started.append(1) or start())
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            loops = list(pool.map(lambda _: cc_wrapper._background_loop(), range(8)))
+
+        assert len(started) == 1
+        assert all(loop is loops[0] for loop in loops)
+
+
+def _words(prefix: str, count: int) -> str:
+    """Return a text of ``count`` words, long enough to have its count cached."""
+    return " ".join(f"{prefix}{i}" for i in range(count))
+
+
+@pytest.mark.unit
+class TestTokenCounting:
+    """Token counts are cached, extended by prefix and batched across wrappers."""
+
+    def test_prefix_hit_counts_only_suffix(self, wrapper, encoder):
+        conversation = _words("turn", 50)
+        assert asyncio.run(wrapper._estimate_tokens(conversation)) == 50
+
+        extended = conversation + "\n\nthree more words"
+        assert asyncio.run(wrapper._estimate_tokens(extended)) == 53
+        # The suffix starts at the segment boundary after the cached prefix
+        assert encoder.texts == [conversation, "\n\nthree more words"]
+
+    def test_lru_eviction(self, wrapper, encoder, monkeypatch):
+        monkeypatch.setattr(cc_wrapper, "TOKEN_CACHE_SIZE", 2)
+        first, second, third = (_words(prefix, 80) for prefix in "abc")
+        for text in (first, second, third):
+            asyncio.run(wrapper._estimate_tokens(text))
+        assert len(cc_wrapper._token_cache) == 2
+
+        asyncio.run(wrapper._estimate_tokens(third))
+        assert encoder.texts == [first, second, third]
+        asyncio.run(wrapper._estimate_tokens(first))
+        assert encoder.texts == [first, second, third, first]
+
+    def test_batched_futures_resolve_to_their_items(self, monkeypatch):
+        batcher = cc_wrapper.TokenCountBatcher()
+        dispatch, batch_sizes = batcher._dispatch, []
+
+        async def recording_dispatch(batch):
+            batch_sizes.append(len(batch))
+            await dispatch(batch)
+
+        monkeypatch.setattr(batcher, "_dispatch", recording_dispatch)
+        client = FakeCountClient()
+        texts = ["x" * length for length in (5, 1, 4, 2, 3)]
+
+        async def count_all():
+            return await asyncio.gather(*(batcher.submit(client, "sonnet", text) for text in texts))
+
+        assert cc_wrapper._run_in_background(count_all()) == [5, 1, 4, 2, 3]
+        assert batch_sizes == [5]
+
+    def test_api_failure_falls_back_to_local_count(self, wrapper, encoder):
+        wrapper.anthropic_client = FakeCountClient(error=RuntimeError("rate limited"))
+        text = _words("word", 50)
+
+        assert asyncio.run(wrapper._estimate_tokens(text)) == 50
+        assert encoder.texts == [text]
+        assert not cc_wrapper._token_cache
+
+
+@pytest.mark.unit
+def test_quiet_wrapper_keeps_verbose_logging(sdk_prompts, monkeypatch, caplog):
+    monkeypatch.delenv("CC_BENCHMARK_CACHE", raising=False)
+    monkeypatch.setattr(cc_wrapper.logger, "level", logging.NOTSET)
+    monkeypatch.setattr(cc_wrapper.logger, "handlers", [])
+    verbose = ClaudeCodeWrapper(verbose=True, skip_auth_check=True)
+    ClaudeCodeWrapper(verbose=False, skip_auth_check=True)
+
+    verbose.run("What is 2 + 2?")
+
+    assert cc_wrapper.logger.level == logging.DEBUG
+    assert "Sending prompt" in caplog.text
+
+
+@pytest.mark.unit
+def test_concurrent_wrappers_share_one_auth_probe(monkeypatch):
+    from concurrent.futures import ThreadPoolExecutor
+
+    probes = []
+
+    async def slow_query(prompt, options):
+        probes.append(prompt)
+        await asyncio.sleep(0.05)  # Long enough for the other wrappers to reach the check
+        yield _result_message("Hi", 0.0, 1, 1)
+
+    monkeypatch.setattr(cc_wrapper, "query", slow_query)
+    monkeypatch.setattr(cc_wrapper, "_AUTH_VERIFIED", set())
+    monkeypatch.delenv("CC_BENCHMARK_CACHE", raising=False)
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        list(pool.map(lambda _: ClaudeCodeWrapper(), range(4)))
+
+    assert probes == ["Hello"]
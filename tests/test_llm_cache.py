@@ -0,0 +1,123 @@
+"""Tests for the on-disk response cache."""
+from pathlib import Path
+
+import pytest
+
+import llm_cache
+from llm_cache import CachedResponse, LLMCache
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return LLMCache(tmp_path / "cache")
+
+
+@pytest.fixture
+def cache_env(monkeypatch):
+    """Clear the cache variables so each test sets only what it needs."""
+    for name in ("CC_BENCHMARK_DIR", llm_cache.CACHE_ENV_VAR, llm_cache.CACHE_DIR_ENV_VAR,
+                 llm_cache.CACHE_TTL_ENV_VAR):
+        monkeypatch.delenv(name, raising=False)
+    return monkeypatch
+
+
+@pytest.mark.unit
+class TestLLMCache:
+    """Entries round-trip through disk and misses never raise."""
+
+    def test_set_get_round_trip(self, cache):
+        key = LLMCache.key("sonnet", Path("/work"), "What is 2 + 2?")
+        cache.set(key, "4", {"cost": 0.01, "input_tokens": 12})
+
+        assert cache.get(key) == CachedResponse("4", {"cost": 0.01, "input_tokens": 12})
+        assert (cache.directory / key[:2] / f"{key}.json").is_file()
+        assert not list(cache.directory.glob("*/*.tmp"))
+
+    def test_missing_key(self, cache):
+        assert cache.get(LLMCache.key("sonnet", Path("/work"), "never stored")) is None
+
+    def test_clear(self, cache):
+        keys = [LLMCache.key("sonnet", Path("/work"), f"prompt {i}") for i in range(3)]
+        for key in keys:
+            cache.set(key, "answer")
+
+        cache.clear()
+
+        assert all(cache.get(key) is None for key in keys)
+
+    def test_expired_entry_is_removed(self, cache, monkeypatch):
+        cache.ttl = 60
+        key = LLMCache.key("sonnet", Path("/work"), "What is 2 + 2?")
+        cache.set(key, "4")
+        assert cache.get(key) is not None
+
+        now = llm_cache.time.time()
+        monkeypatch.setattr(llm_cache.time, "time", lambda: now + 61)
+
+        assert cache.get(key) is None
+        assert not cache._path(key).exists()
+
+    @pytest.mark.parametrize("content", ["", '{"response": "4", "usa', "[1, 2]", '{"usage": {}}'])
+    def test_corrupt_entry_misses(self, cache, content):
+        key = LLMCache.key("sonnet", Path("/work"), "What is 2 + 2?")
+        path = cache._path(key)
+        path.parent.mkdir(parents=True)
+        path.write_text(content, encoding="utf-8")
+
+        assert cache.get(key) is None
+
+
+@pytest.mark.unit
+class TestCacheKeys:
+    """Keys separate models, directories and conversation histories."""
+
+    def test_key_depends_on_call(self):
+        base = LLMCache.key("sonnet", Path("/work"), "What is 2 + 2?")
+
+        assert LLMCache.key("sonnet", Path("/work"), "What is 2 + 2?") == base
+        assert LLMCache.key("opus", Path("/work"), "What is 2 + 2?") != base
+        assert LLMCache.key("sonnet", Path("/other"), "What is 2 + 2?") != base
+        assert LLMCache.key("sonnet", Path("/work"), "What is 2 + 2?", context=["abc"]) != base
+
+    def test_normalized_key_ignores_case_and_whitespace(self):
+        context = [LLMCache.context_hash("Earlier  question")]
+
+        assert (LLMCache.normalized_key("sonnet", Path("/work"), "What is\n2 + 2? ", context=context)
+                == LLMCache.normalized_key("sonnet", Path("/work"), "what is 2 + 2?", context=context))
+        assert LLMCache.context_hash("Earlier  question") == LLMCache.context_hash("earlier question")
+
+
+@pytest.mark.unit
+class TestFromEnv:
+    """The cache is opt-in and configured from CC_BENCHMARK_CACHE* variables."""
+
+    def test_disabled_by_default(self, cache_env):
+        assert LLMCache.from_env() is None
+        cache_env.setenv(llm_cache.CACHE_ENV_VAR, "0")
+        assert LLMCache.from_env() is None
+
+    def test_default_directory(self, cache_env, tmp_path):
+        cache_env.setenv(llm_cache.CACHE_ENV_VAR, "1")
+        cache_env.setenv("CC_BENCHMARK_DIR", str(tmp_path))
+
+        cache = LLMCache.from_env()
+
+        assert cache.directory == tmp_path / ".llm_cache"
+        assert cache.ttl is None
+
+    def test_custom_directory_and_ttl(self, cache_env, tmp_path):
+        cache_env.setenv(llm_cache.CACHE_ENV_VAR, "1")
+        cache_env.setenv(llm_cache.CACHE_DIR_ENV_VAR, str(tmp_path / "custom"))
+        cache_env.setenv(llm_cache.CACHE_TTL_ENV_VAR, "3600")
+
+        cache = LLMCache.from_env()
+
+        assert cache.directory == tmp_path / "custom"
+        assert cache.ttl == 3600.0
+
+    def test_invalid_ttl(self, cache_env):
+        cache_env.setenv(llm_cache.CACHE_ENV_VAR, "1")
+        cache_env.setenv(llm_cache.CACHE_TTL_ENV_VAR, "1h")
+
+        with pytest.raises(ValueError, match=llm_cache.CACHE_TTL_ENV_VAR):
+            LLMCache.from_env()
@@ -1,17 +1,16 @@
 #!/usr/bin/env python3
 """Test that our model constants are in sync with Anthropic SDK."""
-import sys
-from pathlib import Path
-
-# Add project root to path for imports
-project_root = Path(__file__).parent.parent
-sys.path.insert(0, str(project_root))
+import re
+from collections import Counter
 
 import pytest
 from typing import Set, List
 
 from tests.model_sync_checker import ModelSyncChecker
 
+# claude-{family}-{version}[-{date}], where the family is a generation or model name
+_MODEL_RE = re.compile(r"^claude-(3|4|sonnet|haiku|opus)-[\w.-]+$")
+
 
 @pytest.mark.model_sync
 class TestModelSync:
@@ -38,9 +37,8 @@ class TestModelSync:
         assert len(our_models) > 0, "Should have at least some models"
         
         # Check that all models follow Claude naming convention
-        for model in our_models:
-            assert model.startswith("claude-"), f"Model {model} should start with 'claude-'"
-            assert len(model) > 10, f"Model {model} seems too short"
+        bad = [model for model in our_models if not model.startswith("claude-") or len(model) <= 10]
+        assert not bad, f"Models should start with 'claude-' and not be too short: {bad}"
     
     @pytest.mark.integration
     @pytest.mark.requires_anthropic
@@ -59,53 +57,48 @@ class TestModelSync:
     def test_no_duplicate_models(self):
         """Test that we don't have duplicate model definitions."""
         our_models = self.checker._get_our_models()
-        model_set = set(our_models)
+        duplicates = [model for model, count in Counter(our_models).items() if count > 1]
         
-        assert len(our_models) == len(model_set), f"Duplicate models found: {[m for m in our_models if our_models.count(m) > 1]}"
+        assert not duplicates, f"Duplicate models found: {duplicates}"
     
     @pytest.mark.unit
     def test_model_format_consistency(self):
         """Test that all model IDs follow consistent naming patterns."""
         our_models = self.checker._get_our_models()
         
-        for model in our_models:
-            # Check basic format: claude-{family}-{version}-{date} or claude-{family}-{version}
-            parts = model.split('-')
-            assert len(parts) >= 3, f"Model {model} should have at least 3 parts separated by dashes"
-            assert parts[0] == "claude", f"Model {model} should start with 'claude'"
-            assert parts[1] in ["3", "sonnet", "haiku", "opus", "4"], f"Model {model} has unknown family: {parts[1]}"
+        # Check basic format: claude-{family}-{version}-{date} or claude-{family}-{version}
+        malformed = [model for model in our_models if not _MODEL_RE.match(model)]
+        assert not malformed, f"Models with unexpected format or unknown family: {malformed}"
     
     
     def _format_sync_error(self, result: dict) -> str:
         """Format a helpful error message when models are out of sync."""
-        error_lines = [
-            "❌ Models are OUT OF SYNC with Anthropic SDK!",
-            f"   Our models: {result['our_models_count']}",
-            f"   Anthropic models: {result['anthropic_models_count']}",
-            ""
-        ]
+        return "\n".join(self._iter_sync_error_lines(result))
+    
+    @staticmethod
+    def _iter_sync_error_lines(result: dict):
+        """Yield the lines of the out-of-sync error message."""
+        yield "❌ Models are OUT OF SYNC with Anthropic SDK!"
+        yield f"   Our models: {result['our_models_count']}"
+        yield f"   Anthropic models: {result['anthropic_models_count']}"
+        yield ""
         
         if result["new_models"]:
-            error_lines.extend([
-                f"🆕 NEW MODELS ({len(result['new_models'])}):",
-                *[f"   + {model}" for model in result["new_models"]],
-                ""
-            ])
+            yield f"🆕 NEW MODELS ({len(result['new_models'])}):"
+            for model in result["new_models"]:
+                yield f"   + {model}"
+            yield ""
         
         if result["removed_models"]:
-            error_lines.extend([
-                f"🗑️  REMOVED MODELS ({len(result['removed_models'])}):",
-                *[f"   - {model}" for model in result["removed_models"]],
-                ""
-            ])
+            yield f"🗑️  REMOVED MODELS ({len(result['removed_models'])}):"
+            for model in result["removed_models"]:
+                yield f"   - {model}"
+            yield ""
         
         if result["recommendations"]:
-            error_lines.extend([
-                "💡 TO FIX:",
-                *[f"   {i+1}. {rec}" for i, rec in enumerate(result["recommendations"])]
-            ])
-        
-        return "\n".join(error_lines)
+            yield "💡 TO FIX:"
+            for i, rec in enumerate(result["recommendations"], 1):
+                yield f"   {i}. {rec}"
 
 
 # Standalone test runner for CI/CD integration